@@ -2,10 +2,10 @@
 import os
 import glob
 import json
-import math
-import csv
-from collections import defaultdict
 import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")   # headless batch run: no GUI backend
 import matplotlib.pyplot as plt
 
 # ============================================================
@@ -19,93 +19,123 @@ OUTPUT_FIG = os.path.join(RESULTS_DIR, "PA_vs_mphi.png")
 
 TARGET_PA = 0.5   # Queremos localizar P_A = 0.5
 
+# Columnas relevantes de los CSV de sectores
+SECTOR_COLUMNS = ["m_phi", "k_rot", "P_A", "N_total", "N_A"]
+
+# Productos de frontera / zoom: nunca traen P_A ni N_A/N_total
+SKIP_PREFIXES = ("boundary_", "zoom_", "fine_")
+
 
 # ============================================================
 # FUNCIÓN 1 — LECTURA ROBUSTA DE TODOS LOS CSV
 # Ignora automáticamente CSV que NO tengan N_total o P_A
+# (boundary_*, zoom_*, fine_* se descartan sin abrirlos)
+# Devuelve un iterador de DataFrames (uno por CSV): nunca se
+# materializan todas las filas a la vez.
 # ============================================================
 
 def read_sector_csvs(results_dir):
     pattern = os.path.join(results_dir, "*.csv")
-    files = sorted(glob.glob(pattern))
+    files = [
+        f for f in sorted(glob.glob(pattern))
+        if not os.path.basename(f).startswith(SKIP_PREFIXES)
+    ]
 
     if not files:
         raise FileNotFoundError(f"No se encontraron CSV en {results_dir}")
 
-    rows = []
-    total_files = len(files)
-
-    print(f"[INFO] Encontrados {total_files} CSV, empezando lectura...")
-
-    for idx, fname in enumerate(files, start=1):
-        print(f"  -> ({idx}/{total_files}) Leyendo {os.path.basename(fname)}")
-
-        with open(fname, "r", newline="") as f:
-            reader = csv.DictReader(f)
-
-            for r in reader:
+    print(f"[INFO] Encontrados {len(files)} CSV, empezando lectura...")
 
-                # m_phi y k_rot son imprescindibles
-                try:
-                    m_phi = float(r.get("m_phi"))
-                    k_rot = float(r.get("k_rot", 0.0))
-                except:
-                    continue  # fila inválida
+    return _iter_sector_frames(files)
 
-                # Caso 1: Si el CSV trae P_A directamente, perfecto
-                if "P_A" in r and r["P_A"]:
-                    try:
-                        P_A = float(r["P_A"])
-                        rows.append({"m_phi": m_phi, "k_rot": k_rot, "P_A": P_A})
-                    except:
-                        pass
-                    continue
 
-                # Caso 2: Intentar calcular P_A mediante N_A / N_total
-                N_total_raw = r.get("N_total")
-                N_A_raw = r.get("N_A")
-
-                if not N_total_raw or not N_A_raw:
-                    continue  # CSV tipo boundary_* → ignorar
-
-                try:
-                    N_total = float(N_total_raw)
-                    N_A = float(N_A_raw)
-                except:
-                    continue
+def _iter_sector_frames(files):
+    total_files = len(files)
 
-                if N_total > 0:
-                    P_A = N_A / N_total
-                    rows.append({"m_phi": m_phi, "k_rot": k_rot, "P_A": P_A})
+    for idx, fname in enumerate(files, start=1):
+        print(f"  -> ({idx}/{total_files}) Leyendo {os.path.basename(fname)}")
 
-    print(f"[INFO] Filas válidas para análisis: {len(rows)}")
-    return rows
+        # Parseo en bloque (tokenizador C de pandas), solo columnas útiles
+        try:
+            # Solo el campo vacío cuenta como ausente ("abc", "NA"... se
+            # quedan como texto y luego se descartan como no numéricos)
+            df = pd.read_csv(
+                fname,
+                usecols=lambda c: c in SECTOR_COLUMNS,
+                on_bad_lines="skip",
+                keep_default_na=False,
+                na_values=[""],
+            )
+        except (pd.errors.EmptyDataError, pd.errors.ParserError):
+            continue
+
+        # m_phi es imprescindible
+        if "m_phi" not in df.columns:
+            continue
+
+        # P_A vacío → se calcula con N_A / N_total (caso 2); P_A no vacío
+        # pero no numérico → fila inválida, se descarta
+        PA_empty = df["P_A"].isna() if "P_A" in df.columns else None
+
+        df = df.apply(pd.to_numeric, errors="coerce")
+        if PA_empty is not None:
+            df = df[PA_empty | df["P_A"].notna()]
+        if "k_rot" not in df.columns:
+            df["k_rot"] = 0.0
+        df = df.dropna(subset=["m_phi", "k_rot"])
+
+        # Caso 1: Si el CSV trae P_A directamente, perfecto
+        if "P_A" in df.columns:
+            P_A = df["P_A"]
+        else:
+            P_A = pd.Series(np.nan, index=df.index)
+
+        # Caso 2: completar P_A mediante N_A / N_total (solo N_total > 0)
+        if "N_total" in df.columns and "N_A" in df.columns:
+            N_total = df["N_total"]
+            P_A = P_A.fillna(df["N_A"].where(N_total > 0) / N_total)
+
+        # CSV tipo boundary_* → sin P_A utilizable, se descarta solo
+        df = df.assign(P_A=P_A).dropna(subset=["P_A"])
+        yield df[["m_phi", "k_rot", "P_A"]]
 
 
 # ============================================================
 # FUNCIÓN 2 — PROMEDIOS P_A(m_phi)
 # ============================================================
 
-def compute_PA_vs_mphi(rows):
-    groups = defaultdict(list)
+def compute_PA_vs_mphi(frames):
+    # Sumas parciales por m_phi (n, Σ P_A, Σ P_A²), acumuladas CSV a CSV:
+    # memoria O(#valores de m_phi), no O(#filas)
+    acc = None
 
-    for r in rows:
-        P_A = r["P_A"]
-        if not math.isnan(P_A):
-            groups[r["m_phi"]].append(P_A)
+    for df in frames:
+        part = (
+            df.assign(P_A2=df["P_A"] ** 2)
+            .groupby("m_phi")
+            .agg(n=("P_A", "count"), s=("P_A", "sum"), s2=("P_A2", "sum"))
+        )
+        acc = part if acc is None else acc.add(part, fill_value=0.0)
 
-    mphi_vals = sorted(groups.keys())
-    PA_means = []
-    PA_stds = []
+    if acc is None:
+        acc = pd.DataFrame(columns=["n", "s", "s2"], dtype=float)
+
+    acc = acc.sort_index()
+    print(f"[INFO] Filas válidas para análisis: {int(acc['n'].sum())}")
+
+    mphi_vals = acc.index.to_numpy(dtype=float)
 
     print(f"[INFO] Calculando promedios para {len(mphi_vals)} valores de m_phi...")
 
-    for mphi in mphi_vals:
-        arr = np.array(groups[mphi])
-        PA_means.append(arr.mean())
-        PA_stds.append(arr.std(ddof=1) if len(arr) > 1 else 0.0)
+    n = acc["n"].to_numpy(dtype=float)
+    PA_means = acc["s"].to_numpy(dtype=float) / n
 
-    return np.array(mphi_vals), np.array(PA_means), np.array(PA_stds)
+    # std con ddof=1; grupos de un solo elemento → 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (acc["s2"].to_numpy(dtype=float) - n * PA_means**2) / (n - 1)
+    PA_stds = np.where(n > 1, np.sqrt(np.clip(var, 0.0, None)), 0.0)
+
+    return mphi_vals, PA_means, PA_stds
 
 
 # ============================================================
@@ -120,15 +150,18 @@ def find_mphi_crit(mphi_vals, PA_means, target=0.5):
     diff = PA - target
     sign = np.sign(diff)
 
-    for i in range(len(mphi) - 1):
-        if sign[i] * sign[i+1] < 0:  # cruce exacto
-            m1, m2 = mphi[i], mphi[i+1]
-            p1, p2 = PA[i], PA[i+1]
+    # Índices i donde hay cruce exacto entre i e i+1 (sin bucle Python)
+    crossings = np.flatnonzero(sign[:-1] * sign[1:] < 0)
+
+    if crossings.size:
+        i = crossings[0]
+        m1, m2 = mphi[i], mphi[i+1]
+        p1, p2 = PA[i], PA[i+1]
 
-            # interpolación lineal
-            if p2 != p1:
-                frac = (target - p1) / (p2 - p1)
-                return m1 + frac * (m2 - m1)
+        # interpolación lineal
+        if not np.isclose(p2, p1):
+            frac = (target - p1) / (p2 - p1)
+            return float(m1 + frac * (m2 - m1))
 
     return None
 
@@ -138,8 +171,10 @@ def find_mphi_crit(mphi_vals, PA_means, target=0.5):
 # ============================================================
 
 def make_plot(mphi_vals, PA_means, PA_stds, mphi_crit, outfile):
-    plt.figure()
-    plt.errorbar(mphi_vals, PA_means, yerr=PA_stds, marker="o", capsize=4)
+    fig = plt.figure()
+    # puntos/barras rasterizados; ejes y etiquetas siguen vectoriales
+    plt.errorbar(mphi_vals, PA_means, yerr=PA_stds, marker="o", capsize=4,
+                 rasterized=True)
 
     plt.axhline(0.5, linestyle="--", color="gray")
     if mphi_crit:
@@ -151,6 +186,7 @@ def make_plot(mphi_vals, PA_means, PA_stds, mphi_crit, outfile):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     plt.savefig(outfile, dpi=200)
+    plt.close(fig)
 
     print(f"[INFO] Figura guardada en {outfile}")
 
@@ -160,8 +196,8 @@ def make_plot(mphi_vals, PA_means, PA_stds, mphi_crit, outfile):
 # ============================================================
 
 def main():
-    rows = read_sector_csvs(RESULTS_DIR)
-    mphi_vals, PA_means, PA_stds = compute_PA_vs_mphi(rows)
+    frames = read_sector_csvs(RESULTS_DIR)
+    mphi_vals, PA_means, PA_stds = compute_PA_vs_mphi(frames)
     mphi_crit = find_mphi_crit(mphi_vals, PA_means, TARGET_PA)
 
     if mphi_crit:
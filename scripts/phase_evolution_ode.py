@@ -15,15 +15,31 @@ This module provides:
 - S_rot(a, y, params): rotational source term
 - phase_ode(a, y, params): ODE system
 - run_phase_evolution(): high-level solver returning Δφ(a)
+- solve_phase(): low-level solver with prebuilt y0 / output grid
+- make_rhs(): RHS specialised (constant-folded) for a fixed (q, H0)
+- tail_eval_grid(): output points concentrated on the asymptotic tail
+- run_phase_evolution_tail_stats(): (mean, std) of the Δφ tail only
+- tail_stats_grid(): compiled, parallel tail statistics over a
+  (m_phi, k_rot) grid for classification scans
 
 No data or external files are required. The module can be imported
 from other scripts (e.g. phase_sector_scan.py) or executed alone
 for quick tests.
 """
 
+from math import exp, log, sqrt
+
 import numpy as np
 from scipy.integrate import solve_ivp
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional: fall back to plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+    prange = range
+
 
 # ================================================================
 # 1. Loop Quantum Cosmology background (effective Hubble function)
@@ -51,7 +67,7 @@ def H_lqc(a, params):
 
     # Simple matter-like scaling H ∝ a^{-3/2}
     # (Replace with your actual LQC model when ready)
-    return H0 * np.sqrt(a**(-3))
+    return H0 * a**-1.5
 
 
 # ================================================================
@@ -79,7 +95,7 @@ def S_rot(a, y, params):
     q = params.get("q", 1.0)
 
     # Simple model: S_rot(a) ∝ a^{-q}
-    return k_rot * a**(-q)
+    return k_rot / a**q
 
 
 # ================================================================
@@ -118,10 +134,75 @@ def phase_ode(a, y, params):
     return [dphi_da, dphidot_da]
 
 
+@njit(cache=True, fastmath=True)
+def _rhs(a, delta_phi, delta_phidot, m_phi, H0, k_rot, q):
+    """
+    Scalar right-hand side of the phase equation (compiled with numba
+    when available). Same physics as phase_ode(), with the parameters
+    passed as plain floats so the solver loop avoids dict lookups.
+
+    Returns
+    -------
+    tuple : (d(Δφ)/da, d(Δφ˙)/da)
+    """
+    H = H0 / (a * sqrt(a))
+    source = k_rot / a**q
+
+    return delta_phidot, -3.0 * H * delta_phidot - m_phi * m_phi * delta_phi + source
+
+
+# Template for make_rhs(): q and H0 are substituted as literals
+_RHS_TEMPLATE = """
+@njit(fastmath=True)
+def rhs(a, y, m_phi, k_rot):
+    return y[1], -{damping!r} / (a * sqrt(a)) * y[1] - m_phi * m_phi * y[0] + k_rot * {source}
+"""
+
+
+def make_rhs(q, H0=1.0):
+    """
+    RHS specialised for fixed (q, H0), for use as solve_phase(rhs=...).
+
+    q and H0 are constant over a whole scan, so they are written into
+    the generated source as literals and constant-folded by the
+    compiler (q = 1 becomes a plain 1/a). Build it once per scan.
+
+    Returns
+    -------
+    callable : rhs(a, y, m_phi, k_rot) -> (d(Δφ)/da, d(Δφ˙)/da)
+    """
+    q = float(q)
+    if q == 0.0:
+        source = "1.0"
+    elif q == 1.0:
+        source = "(1.0 / a)"
+    else:
+        source = f"a ** {-q!r}"
+
+    src = _RHS_TEMPLATE.format(damping=3.0 * float(H0), source=source)
+    namespace = {"njit": njit, "sqrt": sqrt}
+    exec(src, namespace)
+    return namespace["rhs"]
+
+
 # ================================================================
 # 4. High-level solver
 # ================================================================
 
+def tail_eval_grid(a_ini, a_max, n_steps, tail_frac=0.15):
+    """
+    Output points concentrated on the asymptotic tail.
+
+    Returns a_ini followed by n_steps-1 points uniformly spaced in
+    [(1 - tail_frac) * a_max, a_max]. Sector classifiers only look at
+    the tail, so this avoids sampling the early evolution densely.
+    """
+    return np.concatenate((
+        [a_ini],
+        np.linspace((1.0 - tail_frac) * a_max, a_max, n_steps - 1),
+    ))
+
+
 def run_phase_evolution(
     m_phi,
     k_rot,
@@ -134,6 +215,8 @@ def run_phase_evolution(
     H0=1.0,
     rtol=1e-7,
     atol=1e-9,
+    a_eval=None,
+    method="RK45",
 ):
     """
     Integrates Δφ(a) from a_ini to a_max.
@@ -155,6 +238,15 @@ def run_phase_evolution(
         Effective Hubble normalisation in H_lqc.
     rtol, atol : float
         Integration tolerances.
+    a_eval : array-like, optional
+        Explicit output points (overrides n_steps), e.g. from
+        tail_eval_grid() when only the asymptotic tail is needed.
+    method : str
+        solve_ivp integration method. "LSODA" with rtol=1e-4,
+        atol=1e-6 is enough for the bulk sector-classification scans
+        (checked against RK45 on a held-out grid, see
+        phase_sector_boundary_fine_scan.py); "RK4" uses
+        the compiled fixed-step integrator (see solve_phase()).
 
     Returns
     -------
@@ -166,31 +258,343 @@ def run_phase_evolution(
         Phase derivative Δφ˙(a).
     """
 
-    params = {
-        "m_phi": m_phi,
-        "k_rot": k_rot,
-        "q": q,
-        "H0": H0,
-    }
+    y0 = (delta_phi_ini, delta_phidot_ini)
+    if a_eval is None:
+        a_eval = np.linspace(a_ini, a_max, n_steps)
+
+    return solve_phase(m_phi, k_rot, q, y0, a_eval, H0=H0,
+                       rtol=rtol, atol=atol, method=method)
+
 
-    y0 = [delta_phi_ini, delta_phidot_ini]
-    a_span = (a_ini, a_max)
-    a_eval = np.linspace(a_ini, a_max, n_steps)
+def _rhs_y(a, y, m_phi, H0, k_rot, q):
+    """solve_ivp-facing adapter around the scalar _rhs."""
+    return _rhs(a, y[0], y[1], m_phi, H0, k_rot, q)
+
+
+def solve_phase(
+    m_phi,
+    k_rot,
+    q,
+    y0,
+    a_eval,
+    H0=1.0,
+    rtol=1e-7,
+    atol=1e-9,
+    method="RK45",
+    rhs=None,
+):
+    """
+    Low-level solver used by run_phase_evolution().
+
+    Integrates from a_eval[0] to a_eval[-1] with a prebuilt initial
+    state y0 = (Δφ, Δφ˙) and output grid a_eval, so scans can build
+    both once and reuse them for every (m_phi, k_rot) point.
+
+    rhs, if given, is a specialised RHS from make_rhs(q, H0); q and H0
+    are then already folded into it.
+
+    method="RK4" runs the compiled fixed-step integrator
+    (_rk4_trajectory) instead of solve_ivp: the whole integration stays
+    in machine code, with no Python call of the RHS per step. rtol/atol
+    are ignored in that case, and rhs (a solve_ivp callback) cannot be
+    combined with it: passing both raises ValueError.
+
+    Returns
+    -------
+    a_arr, delta_phi_arr, delta_phidot_arr : ndarray
+    """
+    if method == "RK4":
+        if rhs is not None:
+            raise ValueError('rhs applies only to solve_ivp methods, '
+                             'not to method="RK4"')
+        a_eval = np.asarray(a_eval, dtype=float)
+        phi, phidot = _rk4_trajectory(
+            float(m_phi), float(k_rot), float(q), float(H0),
+            float(y0[0]), float(y0[1]), a_eval, RK4_DLOG_MAX,
+        )
+        return a_eval, phi, phidot
+
+    if rhs is None:
+        fun = _rhs_y
+        args = (float(m_phi), float(H0), float(k_rot), float(q))
+    else:
+        fun = rhs
+        args = (float(m_phi), float(k_rot))
 
     sol = solve_ivp(
-        fun=lambda a, y: phase_ode(a, y, params),
-        t_span=a_span,
+        fun=fun,
+        t_span=(a_eval[0], a_eval[-1]),
         y0=y0,
         t_eval=a_eval,
+        args=args,
         rtol=rtol,
         atol=atol,
+        method=method,
     )
 
     return sol.t, sol.y[0], sol.y[1]
 
 
+def run_phase_evolution_tail_stats(
+    m_phi,
+    k_rot,
+    q,
+    delta_phi_ini=0.0,
+    delta_phidot_ini=0.0,
+    a_ini=1e-3,
+    a_max=10.0,
+    n_tail=200,
+    tail_frac=0.15,
+    H0=1.0,
+    rtol=1e-7,
+    atol=1e-9,
+    method="RK45",
+    rhs=None,
+    a_eval=None,
+):
+    """
+    Tail statistics of Δφ(a) without keeping the trajectory.
+
+    The solver only outputs n_tail points in [(1 - tail_frac) a_max, a_max]
+    and the mean/std over them is returned directly, which is all the
+    sector classifiers need. rhs is passed through to solve_phase().
+
+    a_eval, if given, is a prebuilt tail_eval_grid() (overrides a_ini,
+    a_max, n_tail and tail_frac), so scans build it once instead of on
+    every call.
+
+    Returns
+    -------
+    mean_tail, std_tail : float
+        NaN if the integration stops before reaching the tail.
+    """
+    if a_eval is None:
+        a_eval = tail_eval_grid(a_ini, a_max, n_tail + 1, tail_frac)
+
+    _, dphi, _ = solve_phase(m_phi, k_rot, q,
+                             (delta_phi_ini, delta_phidot_ini), a_eval,
+                             H0=H0, rtol=rtol, atol=atol, method=method,
+                             rhs=rhs)
+
+    tail = dphi[1:]
+    if tail.size < len(a_eval) - 1:
+        return np.nan, np.nan
+
+    return float(tail.mean()), float(tail.std())
+
+
+# ================================================================
+# 5. Compiled RK4 integrators (no Python callback per step)
+# ================================================================
+
+# Largest log-step in a: keeps h·3H(a) inside the RK4 stability region
+# at a_ini = 1e-3 (about 4000 steps over a ∈ [1e-3, 10])
+RK4_DLOG_MAX = 2.5e-3
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_step(a, h, y0, y1, m_phi, H0, k_rot, q):
+    """One classical RK4 step of size h for (Δφ, Δφ˙)."""
+    k1a, k1b = _rhs(a, y0, y1, m_phi, H0, k_rot, q)
+    k2a, k2b = _rhs(a + 0.5 * h, y0 + 0.5 * h * k1a, y1 + 0.5 * h * k1b,
+                    m_phi, H0, k_rot, q)
+    k3a, k3b = _rhs(a + 0.5 * h, y0 + 0.5 * h * k2a, y1 + 0.5 * h * k2b,
+                    m_phi, H0, k_rot, q)
+    k4a, k4b = _rhs(a + h, y0 + h * k3a, y1 + h * k3b,
+                    m_phi, H0, k_rot, q)
+
+    return (y0 + h * (k1a + 2.0 * k2a + 2.0 * k3a + k4a) / 6.0,
+            y1 + h * (k1b + 2.0 * k2b + 2.0 * k3b + k4b) / 6.0)
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_advance(a0, a1, y0, y1, m_phi, H0, k_rot, q, dlog_max):
+    """
+    RK4 from a0 to a1 with log-spaced substeps of at most dlog_max in
+    log(a). Returns the state (Δφ, Δφ˙) at a1.
+    """
+    dlog = log(a1 / a0)
+    n_sub = max(1, int(np.ceil(dlog / dlog_max)))
+    r = exp(dlog / n_sub)
+
+    a = a0
+    for _ in range(n_sub):
+        y0, y1 = _rk4_step(a, a * (r - 1.0), y0, y1, m_phi, H0, k_rot, q)
+        a *= r
+
+    return y0, y1
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_trajectory(m_phi, k_rot, q, H0, delta_phi_ini, delta_phidot_ini,
+                    a_eval, dlog_max):
+    """
+    Fixed-step RK4 through the output points a_eval, with log-spaced
+    substeps of at most dlog_max in log(a) between consecutive points.
+
+    Returns
+    -------
+    delta_phi_arr, delta_phidot_arr : ndarray
+    """
+    n = a_eval.shape[0]
+    phi = np.empty(n)
+    phidot = np.empty(n)
+
+    y0 = delta_phi_ini
+    y1 = delta_phidot_ini
+    phi[0] = y0
+    phidot[0] = y1
+
+    for i in range(1, n):
+        y0, y1 = _rk4_advance(a_eval[i - 1], a_eval[i], y0, y1,
+                              m_phi, H0, k_rot, q, dlog_max)
+        phi[i] = y0
+        phidot[i] = y1
+
+    return phi, phidot
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_tail_stats(m_phi, k_rot, q, H0, delta_phi_ini, delta_phidot_ini,
+                    a_eval, dlog_max):
+    """
+    Mean/std of Δφ over the output points a_eval[1:], integrated as in
+    _rk4_trajectory but keeping only running sums (no trajectory is
+    stored).
+
+    a_eval is a_ini followed by the tail samples (see tail_eval_grid()),
+    so the statistic is taken over points evenly spaced in a, exactly
+    like the trajectory-based classifiers.
+
+    Returns
+    -------
+    tuple : (mean, std) of Δφ over the tail samples
+    """
+    n = a_eval.shape[0] - 1
+    if n < 1:
+        return np.nan, np.nan
+
+    y0 = delta_phi_ini
+    y1 = delta_phidot_ini
+
+    s = 0.0
+    s2 = 0.0
+
+    for i in range(1, n + 1):
+        y0, y1 = _rk4_advance(a_eval[i - 1], a_eval[i], y0, y1,
+                              m_phi, H0, k_rot, q, dlog_max)
+        s += y0
+        s2 += y0 * y0
+
+    mean = s / n
+    var = s2 / n - mean * mean
+    return mean, sqrt(max(var, 0.0))
+
+
+@njit(parallel=True, cache=True)
+def tail_stats_grid(m_values, k_values, q, a_eval, delta_phi_ini=0.0,
+                    delta_phidot_ini=0.0, H0=1.0):
+    """
+    Tail mean/std of Δφ(a) over a whole (m_phi, k_rot) grid.
+
+    Every grid point is an independent RK4 integration, run in parallel
+    with numba.prange over the flattened grid. The statistics are taken
+    over a_eval[1:], with a_eval[0] = a_ini (build it with
+    tail_eval_grid()). Meant for classification scans where only the
+    asymptotic tail matters.
+
+    Returns
+    -------
+    mean_tail, std_tail : ndarray, shape (len(m_values), len(k_values))
+    """
+    n_m = m_values.shape[0]
+    n_k = k_values.shape[0]
+
+    mean_tail = np.empty(n_m * n_k)
+    std_tail = np.empty(n_m * n_k)
+
+    for idx in prange(n_m * n_k):
+        mu, sd = _rk4_tail_stats(
+            m_values[idx // n_k], k_values[idx % n_k], q, H0,
+            delta_phi_ini, delta_phidot_ini, a_eval, RK4_DLOG_MAX,
+        )
+        mean_tail[idx] = mu
+        std_tail[idx] = sd
+
+    return mean_tail.reshape((n_m, n_k)), std_tail.reshape((n_m, n_k))
+
+
+@njit(parallel=True, cache=True)
+def _rk4_trajectory_batch(m_values, k_values, q_values, H0, phi_ini,
+                          phidot_ini, a_eval, dlog_max):
+    """_rk4_trajectory over N parameter points in parallel (rows)."""
+    n = m_values.shape[0]
+    phi = np.empty((n, a_eval.shape[0]))
+    phidot = np.empty((n, a_eval.shape[0]))
+
+    for i in prange(n):
+        phi[i], phidot[i] = _rk4_trajectory(
+            m_values[i], k_values[i], q_values[i], H0,
+            phi_ini[i], phidot_ini[i], a_eval, dlog_max,
+        )
+
+    return phi, phidot
+
+
+def run_phase_evolution_batch(
+    m_phi_arr,
+    k_rot_arr,
+    delta_phi_ini_arr,
+    q=1.0,
+    delta_phidot_ini=0.0,
+    a_ini=1e-3,
+    a_max=10.0,
+    n_steps=2000,
+    H0=1.0,
+    a_eval=None,
+):
+    """
+    Integrates Δφ(a) for a whole ensemble of parameter points at once.
+
+    Batched counterpart of run_phase_evolution(method="RK4"): all points
+    share the output grid and are integrated in parallel by the compiled
+    RK4 integrator, so scans make one call instead of one per point.
+
+    Parameters
+    ----------
+    m_phi_arr, k_rot_arr, delta_phi_ini_arr : array-like
+        Per-point parameters, broadcast to a common length N.
+    q, delta_phidot_ini : float or array-like
+        Broadcast against the arrays above.
+    a_ini, a_max, n_steps, H0, a_eval :
+        As in run_phase_evolution().
+
+    Returns
+    -------
+    a_arr : ndarray, shape (T,)
+        Scale factor values.
+    delta_phi_arr : ndarray, shape (N, T)
+        Phase difference Δφ(a), one row per point.
+    delta_phidot_arr : ndarray, shape (N, T)
+        Phase derivative Δφ˙(a), one row per point.
+    """
+    m, k, phi0, qq, phidot0 = (
+        np.ascontiguousarray(x, dtype=float).ravel()
+        for x in np.broadcast_arrays(m_phi_arr, k_rot_arr, delta_phi_ini_arr,
+                                     q, delta_phidot_ini)
+    )
+
+    if a_eval is None:
+        a_eval = np.linspace(a_ini, a_max, n_steps)
+    a_eval = np.asarray(a_eval, dtype=float)
+
+    phi, phidot = _rk4_trajectory_batch(m, k, qq, float(H0), phi0, phidot0,
+                                        a_eval, RK4_DLOG_MAX)
+    return a_eval, phi, phidot
+
+
 # ================================================================
-# 5. Optional quick test (does not run when imported)
+# 6. Optional quick test (does not run when imported)
 # ================================================================
 
 if __name__ == "__main__":
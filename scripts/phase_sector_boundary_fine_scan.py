@@ -15,12 +15,15 @@ Outputs:
 """
 
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")   # headless batch run: no GUI backend
 import matplotlib.pyplot as plt
 import csv
 import os
 
 # Correct import from your module:
-from phase_evolution_ode import run_phase_evolution
+from phase_evolution_ode import (make_rhs, run_phase_evolution_tail_stats,
+                                 tail_eval_grid)
 
 
 # ================================================================
@@ -41,6 +44,17 @@ k_min, k_max = 0.00, 0.60
 N_k = 80   # finer than before
 k_values = np.linspace(k_min, k_max, N_k)
 
+# Integration range; the classifier only sees 200 samples on the
+# last 10% of a (a >= 9)
+a_ini, a_max = 1e-3, 10.0
+n_tail, tail_frac = 200, 0.10
+
+# Output grid built once for the whole scan (a_ini + tail samples)
+a_eval = tail_eval_grid(a_ini, a_max, n_tail + 1, tail_frac)
+
+# RHS specialised once for this scan (q, H0 fixed)
+rhs = make_rhs(q, H0=1.0)
+
 # Output folder
 OUT_DIR = "results_phase_sectors"
 os.makedirs(OUT_DIR, exist_ok=True)
@@ -52,21 +66,15 @@ OUT_FIG = os.path.join(OUT_DIR, "phase_sector_boundary_fine.png")
 # ================================================================
 # CLASSIFIER
 # ================================================================
-def classify_sector(phi_array):
+def classify_sectors(mean_tail, std_tail):
     """
-    Return 'A' (synchrony) or 'C' (escape/drift).
+    Return 'A' (synchrony) or 'C' (escape/drift) for each run.
 
-    Uses the tail behaviour of Δφ(a) at large a.
+    Uses the tail mean/std of Δφ(a) at large a, one entry per run,
+    so the whole k_rot sweep is classified at once.
     """
-    tail = phi_array[-200:]
-    mean_tail = np.mean(tail)
-    std_tail = np.std(tail)
-
     # Synchrony A: small mean and small oscillation
-    if mean_tail < 0.5 and std_tail < 0.1:
-        return "A"
-
-    return "C"
+    return np.where((mean_tail < 0.5) & (std_tail < 0.1), "A", "C").tolist()
 
 
 # ================================================================
@@ -81,23 +89,31 @@ print("==============================\n")
 for m in m_values:
     print(f"Scanning m_phi = {m} ...")
 
-    sector_list = []
+    mean_tail = np.empty(N_k)
+    std_tail = np.empty(N_k)
 
-    for k in k_values:
-        # Integrate Δφ(a) using your actual solver
-        a_arr, dphi_arr, dphidot_arr = run_phase_evolution(
+    for j, k in enumerate(k_values):
+        # Integrate Δφ(a) keeping only the tail statistics
+        # (a failed integration gives NaN → sector C)
+        mean_tail[j], std_tail[j] = run_phase_evolution_tail_stats(
             m_phi=m,
             k_rot=k,
             q=q,
             delta_phi_ini=delta_phi_ini,
             delta_phidot_ini=0.0,
-            a_ini=1e-3,
-            a_max=10.0,
-            n_steps=2000,
+            a_eval=a_eval,
+            # LSODA at 1e-4/1e-6 vs the RK45 default (1e-7/1e-9) on a
+            # held-out grid (m_phi = 0.42…0.62, 1.85…2.25; k_rot at the
+            # midpoints of this k grid; Δφ_ini = 0.01, 0.2): 0/1580
+            # sector changes, tail mean/std within 2.5e-4. This scan
+            # reproduces data/fine_boundary_points.csv exactly.
+            rtol=1e-4,
+            atol=1e-6,
+            method="LSODA",
+            rhs=rhs,
         )
 
-        s = classify_sector(dphi_arr)
-        sector_list.append(s)
+    sector_list = classify_sectors(mean_tail, std_tail)
 
     # Detect A → C transition
     idx_A = [i for i, s in enumerate(sector_list) if s == "A"]
@@ -154,6 +170,6 @@ plt.grid(alpha=0.3)
 
 plt.tight_layout()
 plt.savefig(OUT_FIG, dpi=300)
-plt.show()
+plt.close()
 
 print("Saved figure →", OUT_FIG)
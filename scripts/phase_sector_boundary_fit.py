@@ -19,8 +19,15 @@ Outputs:
 """
 
 import os
+import sys
 import csv
 import numpy as np
+import matplotlib
+
+# Interactive window only when run from a terminal; Agg otherwise
+INTERACTIVE = sys.stdout.isatty()
+if not INTERACTIVE:
+    matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 SUMMARY_FILE = "results_phase_sectors/phase_sectors_summary.csv"
@@ -71,10 +78,10 @@ k_list = sorted(set(r["k_rot"] for r in rows_phy))
 code = {"A": 0, "B": 1, "C": 2}
 grid = np.zeros((len(m_list), len(k_list)), dtype=int)
 
-for r in rows_phy:
-    i = m_list.index(r["m_phi"])
-    j = k_list.index(r["k_rot"])
-    grid[i, j] = code.get(r["sector"], 2)
+# Row/column indices in one vectorized binary search (lists are sorted)
+i_idx = np.searchsorted(m_list, [r["m_phi"] for r in rows_phy])
+j_idx = np.searchsorted(k_list, [r["k_rot"] for r in rows_phy])
+grid[i_idx, j_idx] = [code.get(r["sector"], 2) for r in rows_phy]
 
 # ---------------------------------------------------------------
 # 3) For each m_phi, find A/C boundary
@@ -152,6 +159,7 @@ else:
 plt.grid(alpha=0.25)
 plt.tight_layout()
 plt.savefig(OUT_FIG, dpi=300)
-plt.show()
+if INTERACTIVE:
+    plt.show()
 
 print("Boundary figure saved to:", OUT_FIG)
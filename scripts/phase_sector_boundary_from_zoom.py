@@ -21,6 +21,10 @@ El script:
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pac
+import matplotlib
+matplotlib.use("Agg")   # headless batch run: no GUI backend
 import matplotlib.pyplot as plt
 import os
 
@@ -36,7 +40,7 @@ base = os.path.dirname(os.path.abspath(__file__))
 folder = os.path.join(base, "zoom_fractal")
 
 zone_files = ["Zone1.csv", "Zone2.csv", "Zone3.csv"]
-dfs = []
+tables = []
 
 for zfile in zone_files:
     path = os.path.join(folder, zfile)
@@ -44,10 +48,10 @@ for zfile in zone_files:
         print(f"ERROR: No se encuentra {path}")
         exit(1)
     print(f" → Loaded: {zfile}")
-    dfs.append(pd.read_csv(path))
+    tables.append(pac.read_csv(path))
 
-# Concatenar
-data = pd.concat(dfs, ignore_index=True)
+# Concatenar en Arrow (columnas tipadas) y convertir a pandas una sola vez
+data = pa.concat_tables(tables).to_pandas()
 
 # Normalizar columnas si vienen con nombres raros
 data.columns = [c.strip() for c in data.columns]
@@ -69,28 +73,26 @@ print("\n========================================")
 print(" Detecting A–C boundary transitions ...")
 print("========================================\n")
 
-boundary_points = []
+# Ordenar por (m_phi, Delta_phi_ini): cada fila de m_phi queda contigua
+data = data.sort_values(["m_phi", "Delta_phi_ini"], kind="stable")
 
-# Ordenar por m_phi
-m_values = np.sort(data["m_phi"].unique())
+m_vals = data["m_phi"].to_numpy()
+dphi_vals = data["Delta_phi_ini"].to_numpy()
+sec_vals = data["sector_code"].to_numpy()
 
-for i, m in enumerate(m_values):
-    df_m = data[data["m_phi"] == m].sort_values("Delta_phi_ini")
+# Pares consecutivos dentro del mismo m_phi con transición AC o CA
+# (códigos 0 y 2: suma 2 y distintos; B o sectores desconocidos no cuentan)
+same_m = m_vals[:-1] == m_vals[1:]
+is_AC = (sec_vals[:-1] + sec_vals[1:] == 2) & (sec_vals[:-1] != sec_vals[1:])
+mask = same_m & is_AC
 
-    dphi_vals = df_m["Delta_phi_ini"].values
-    sec_vals = df_m["sector_code"].values
+# punto medio
+boundary_points = np.column_stack((
+    m_vals[:-1][mask],
+    0.5 * (dphi_vals[:-1][mask] + dphi_vals[1:][mask]),
+))
 
-    # Buscar transición AC o CA
-    for j in range(len(sec_vals) - 1):
-        s1, s2 = sec_vals[j], sec_vals[j+1]
-        if {s1, s2} == {0, 2}:  # A ↔ C
-            # punto medio
-            k_est = (dphi_vals[j] + dphi_vals[j+1]) / 2.0
-            boundary_points.append((m, k_est))
-
-    print(f"Row {i+1}/{len(m_values)} processed...")
-
-boundary_points = np.array(boundary_points)
+print(f"{len(np.unique(m_vals))} rows of m_phi processed...")
 
 if boundary_points.size == 0:
     print("\nWARNING: No A–C boundary found.")
@@ -119,7 +121,7 @@ fig = plt.figure(figsize=(10, 6))
 
 if boundary_points.size > 0:
     plt.scatter(boundary_points[:, 1], boundary_points[:, 0],
-                c="red", s=20, label="Boundary A–C")
+                c="red", s=20, label="Boundary A–C", rasterized=True)
 
 plt.xlabel(r"$\Delta\phi_{\rm ini}$")
 plt.ylabel(r"$m_\phi$")
@@ -128,7 +130,7 @@ plt.grid(True)
 
 out_fig = os.path.join(base, "results_phase_sectors", "phase_sector_boundary_from_zoom.png")
 plt.savefig(out_fig, dpi=200)
-plt.close()
+plt.close(fig)
 
 print(f"Figure saved → {out_fig}")
 
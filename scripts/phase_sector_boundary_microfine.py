@@ -18,8 +18,11 @@ Outputs:
 
 import numpy as np
 import os
+import csv
+import matplotlib
+matplotlib.use("Agg")   # headless batch run: no GUI backend
 import matplotlib.pyplot as plt
-from phase_evolution_ode import run_phase_evolution
+from phase_evolution_ode import tail_stats_grid
 
 # ------------------------------------------------------------------
 # 1. SCAN PARAMETERS
@@ -29,66 +32,60 @@ m_values = np.arange(0.395, 0.405 + 1e-12, 0.0002)
 k_values = np.arange(0.380, 0.390 + 1e-12, 0.0002)
 
 delta_phi_ini = 2.827433388   # antipodal for maximum sensitivity
-delta_phidot_ini = 0
+delta_phidot_ini = 0.0
 q = 1.0
 a_ini = 1e-3
 a_max = 10.0
 tail_frac = 0.15
+n_steps = 1500   # uniform output grid in a of the trajectory classifier
+
+# Output points: a_ini followed by the tail samples of that grid (the
+# last tail_frac of linspace(a_ini, a_max, n_steps), 225 points), so the
+# statistics are over exactly the samples the classifier thresholds
+a_grid = np.linspace(a_ini, a_max, n_steps)
+a_eval = np.concatenate(([a_ini], a_grid[int(n_steps * (1 - tail_frac)):]))
 
 outdir = "results_phase_sectors"
 os.makedirs(outdir, exist_ok=True)
 outfile = os.path.join(outdir, "boundary_microfine.csv")
 
-# CSV header
-with open(outfile, "w") as f:
-    f.write("m_phi,k_rot,sector\n")
-
 print("\n===============================================")
 print("  PHASE 2.4c — MICRO-FINE CRITICAL SCAN")
 print("===============================================\n")
 
 boundary_points = []
 
-def classify_sector(a, dphi):
-    """Classify A/B/C using tail statistics."""
-    tail = dphi[int(len(dphi)*(1-tail_frac)):]
-    mean_tail = np.mean(tail)
-    std_tail = np.std(tail)
-
-    if std_tail < 0.05:
-        if abs(mean_tail) < 2.5:
-            return "A"
-        else:
-            return "B"
-    else:
-        return "C"
+def classify_sectors(mean_tail, std_tail):
+    """Classify A/B/C using tail statistics (arrays, one entry per run)."""
+    codes = np.where(std_tail < 0.05,
+                     np.where(np.abs(mean_tail) < 2.5, 0, 1),
+                     2).astype(np.int8)
+    return np.array(["A", "B", "C"])[codes]
 
 
 # ------------------------------------------------------------------
-# 2. MAIN SCAN
+# 2. MAIN SCAN (compiled RK4 over the whole grid, all cores)
 # ------------------------------------------------------------------
-for m_phi in m_values:
+print(f"Integrating {m_values.size * k_values.size} points ...")
+
+mean_tail, std_tail = tail_stats_grid(
+    m_values, k_values, q, a_eval,
+    delta_phi_ini=delta_phi_ini,
+    delta_phidot_ini=delta_phidot_ini,
+)
+
+# (n_m, n_k) sector grid
+sectors = classify_sectors(mean_tail, std_tail)
+
+rows = []
+
+for i, m_phi in enumerate(m_values):
     print(f"Scanning m_phi = {m_phi:.6f} ...")
     last_sector = None
 
-    for k_rot in k_values:
-        # integrate
-        a, dphi, _ = run_phase_evolution(
-            m_phi=m_phi,
-            k_rot=k_rot,
-            q=q,
-            delta_phi_ini=delta_phi_ini,
-            delta_phidot_ini=delta_phidot_ini,
-            a_ini=a_ini,
-            a_max=a_max,
-            n_steps=1500,
-        )
-
-        sector = classify_sector(a, dphi)
-
-        # append row
-        with open(outfile, "a") as f:
-            f.write(f"{m_phi},{k_rot},{sector}\n")
+    for j, k_rot in enumerate(k_values):
+        sector = str(sectors[i, j])
+        rows.append((m_phi, k_rot, sector))
 
         # detect boundary
         if last_sector is not None and sector != last_sector:
@@ -97,15 +94,21 @@ for m_phi in m_values:
 
         last_sector = sector
 
+# write all rows at once
+with open(outfile, "w", newline="") as f:
+    w = csv.writer(f)
+    w.writerow(["m_phi", "k_rot", "sector"])
+    w.writerows(rows)
+
 
 # ------------------------------------------------------------------
 # 3. PLOT BOUNDARY
 # ------------------------------------------------------------------
-plt.figure(figsize=(6,5))
+fig = plt.figure(figsize=(6,5))
 
 if boundary_points:
     M, K = zip(*boundary_points)
-    plt.scatter(M, K, c="red", s=22, label="Boundary A/C")
+    plt.scatter(M, K, c="red", s=22, label="Boundary A/C", rasterized=True)
 else:
     plt.text(0.397, 0.385, "No boundary detected", fontsize=12)
 
@@ -117,6 +120,7 @@ plt.tight_layout()
 
 figfile = os.path.join(outdir, "boundary_microfine.png")
 plt.savefig(figfile, dpi=160)
+plt.close(fig)
 
 print("\nSaved CSV →", outfile)
 print("Saved figure →", figfile)
@@ -13,8 +13,15 @@ This version:
 """
 
 import os
-import csv
+import sys
 import numpy as np
+import pandas as pd
+import matplotlib
+
+# Interactive window only when run from a terminal; Agg otherwise
+INTERACTIVE = sys.stdout.isatty()
+if not INTERACTIVE:
+    matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 
@@ -28,18 +35,7 @@ if not os.path.isfile(SUMMARY_FILE):
     raise RuntimeError("phase_sectors_summary.csv not found. "
                        "Run phase_sector_scan.py first.")
 
-rows = []
-with open(SUMMARY_FILE, "r") as f:
-    reader = csv.DictReader(f)
-    for r in reader:
-        rows.append(r)
-
-# Convert types
-for r in rows:
-    r["m_phi"] = float(r["m_phi"])
-    r["k_rot"] = float(r["k_rot"])
-    r["delta_phi_ini"] = float(r["delta_phi_ini"])
-    r["sector"] = r["sector"]
+df = pd.read_csv(SUMMARY_FILE)
 
 
 # ===============================================================
@@ -47,21 +43,21 @@ for r in rows:
 # ===============================================================
 
 q_plot = 1.0
-rows_q = [r for r in rows if abs(float(r["q"]) - q_plot) < 1e-9]
+df_q = df[np.isclose(df["q"], q_plot, rtol=0.0, atol=1e-9)]
 
-if len(rows_q) == 0:
+if len(df_q) == 0:
     raise RuntimeError("No rows found for q={}".format(q_plot))
 
-# Extract unique parameter values
-m_list = sorted(set(r["m_phi"] for r in rows_q))
-k_list = sorted(set(r["k_rot"] for r in rows_q))
-dphi_list = sorted(set(r["delta_phi_ini"] for r in rows_q))
+# Extract unique parameter values (sorted)
+m_list = np.sort(df_q["m_phi"].unique())
+k_list = np.sort(df_q["k_rot"].unique())
+dphi_list = np.sort(df_q["delta_phi_ini"].unique())
 
 # We choose the Δφ_ini = 0.01 slice for the 2D map
 target_ini = 0.01
-rows_map = [r for r in rows_q if abs(r["delta_phi_ini"] - target_ini) < 1e-6]
+df_map = df_q[np.isclose(df_q["delta_phi_ini"], target_ini, rtol=0.0, atol=1e-6)]
 
-if len(rows_map) == 0:
+if len(df_map) == 0:
     raise RuntimeError("No rows found with delta_phi_ini = {}".format(target_ini))
 
 
@@ -72,14 +68,15 @@ if len(rows_map) == 0:
 # Sector coding
 code = {"A": 0, "B": 1, "C": 2}
 
-# Initialize grid
-grid = np.zeros((len(m_list), len(k_list)), dtype=int)
-
-for r in rows_map:
-    i = m_list.index(r["m_phi"])
-    j = k_list.index(r["k_rot"])
-    sector = r["sector"]
-    grid[i, j] = code.get(sector, 2)
+# Pivot (m_phi × k_rot) in one vectorized step; empty cells → 0
+grid = (
+    df_map.assign(code=df_map["sector"].map(code).fillna(2).astype(int))
+    .pivot_table(index="m_phi", columns="k_rot", values="code", aggfunc="last")
+    .reindex(index=m_list, columns=k_list)
+    .fillna(0)
+    .astype(int)
+    .to_numpy()
+)
 
 # ===============================================================
 # 4. Plot
@@ -114,6 +111,7 @@ plt.tight_layout()
 
 OUT_PATH = "results_phase_sectors/phase_sector_map.png"
 plt.savefig(OUT_PATH, dpi=300)
-plt.show()
+if INTERACTIVE:
+    plt.show()
 
 print("\nMAP GENERATED:", OUT_PATH)
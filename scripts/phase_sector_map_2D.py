@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 import os
 import glob
-import csv
-import math
-from collections import defaultdict
 import numpy as np
+import pandas as pd
+
+try:
+    import numpy_groupies as npg
+except ImportError:  # opcional: sin él se usa groupby de pandas
+    npg = None
+import matplotlib
+matplotlib.use("Agg")   # headless batch run: no GUI backend
 import matplotlib.pyplot as plt
+from matplotlib import cm
+from matplotlib import colors as mcolors
 
 # ============================================================
 # CONFIGURACIÓN GENERAL
@@ -15,12 +22,84 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RESULTS_DIR = os.path.join(BASE_DIR, "results_phase_sectors")
 OUTPUT_FIG = os.path.join(RESULTS_DIR, "PA_map_mphi_krot.png")
 
+# Columnas relevantes de los CSV de sectores
+SECTOR_COLUMNS = ["m_phi", "k_rot", "P_A", "N_total", "N_A"]
+
+# Tipos declarados: el parser C no tiene que inferirlos por columna.
+# float64 (no float32): m_phi y k_rot son claves de agrupación
+SECTOR_DTYPES = dict.fromkeys(SECTOR_COLUMNS, np.float64)
+
+# Filas por bloque al leer cada CSV
+CHUNK_ROWS = 200_000
+
 
 # ============================================================
 # FUNCIÓN 1 — LECTURA ROBUSTA DE CSV
 # Ignora boundary*, zoom*, y todo archivo sin datos completos
+# Lectura por bloques: de cada bloque solo se guardan Σ P_A y n por
+# celda (m_phi, k_rot), nunca todas las filas.
 # ============================================================
 
+def clean_chunk(df):
+    # Necesitamos al menos m_phi
+    if "m_phi" not in df.columns:
+        return None
+
+    # P_A vacío → se calcula con N_A / N_total (caso 2); P_A no vacío
+    # pero no numérico → fila inválida, se descarta
+    PA_empty = df["P_A"].isna() if "P_A" in df.columns else None
+
+    df = df.apply(pd.to_numeric, errors="coerce")
+    if PA_empty is not None:
+        df = df[PA_empty | df["P_A"].notna()]
+    if "k_rot" not in df.columns:
+        df["k_rot"] = 0.0
+    df = df.dropna(subset=["m_phi", "k_rot"])
+
+    # Caso 1: CSV trae P_A
+    if "P_A" in df.columns:
+        P_A = df["P_A"]
+    else:
+        P_A = pd.Series(np.nan, index=df.index)
+
+    # Caso 2: calcular P_A desde N_A / N_total (solo N_total > 0)
+    if "N_total" in df.columns and "N_A" in df.columns:
+        N_total = df["N_total"]
+        P_A = P_A.fillna(df["N_A"].where(N_total > 0) / N_total)
+
+    # CSV boundary* → sin P_A, se descarta solo
+    return df.assign(P_A=P_A).dropna(subset=["P_A"])[["m_phi", "k_rot", "P_A"]]
+
+
+def read_parts(fname, dtype=None):
+    parts = []
+    n_rows = 0
+
+    # Parseo por bloques (tokenizador C de pandas), solo columnas útiles.
+    # Solo el campo vacío cuenta como ausente ("abc", "NA"... no se
+    # convierten en NaN al leer y clean_chunk los descarta)
+    with pd.read_csv(
+        fname,
+        usecols=lambda c: c in SECTOR_COLUMNS,
+        dtype=dtype,
+        engine="c",
+        keep_default_na=False,
+        na_values=[""],
+        on_bad_lines="skip",
+        chunksize=CHUNK_ROWS,
+    ) as reader:
+        for chunk in reader:
+            chunk = clean_chunk(chunk)
+            if chunk is None:
+                break
+
+            n_rows += len(chunk)
+            part = chunk.groupby(["m_phi", "k_rot"])["P_A"].agg(["sum", "count"])
+            parts.append(part.reset_index().to_numpy(dtype=float))
+
+    return parts, n_rows
+
+
 def read_rows(results_dir):
     pattern = os.path.join(results_dir, "*.csv")
     files = sorted(glob.glob(pattern))
@@ -28,7 +107,8 @@ def read_rows(results_dir):
     if not files:
         raise FileNotFoundError(f"No se encontraron CSV en {results_dir}")
 
-    rows = []
+    parts = []
+    n_rows = 0
     total_files = len(files)
 
     print(f"[INFO] {total_files} CSV encontrados para el mapa 2D.")
@@ -36,46 +116,22 @@ def read_rows(results_dir):
     for idx, fname in enumerate(files, start=1):
         print(f"  -> ({idx}/{total_files}) Leyendo {os.path.basename(fname)}")
 
-        with open(fname, "r", newline="") as f:
-            reader = csv.DictReader(f)
-
-            for r in reader:
-
-                # Necesitamos al menos m_phi y k_rot
-                try:
-                    m_phi = float(r.get("m_phi"))
-                    k_rot = float(r.get("k_rot", 0.0))
-                except:
-                    continue
+        try:
+            file_parts, n_file = read_parts(fname, SECTOR_DTYPES)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError):
+            continue
+        except ValueError:
+            # Algún valor no numérico: relectura sin tipos declarados
+            # (clean_chunk lo convierte en NaN con to_numeric)
+            file_parts, n_file = read_parts(fname)
 
-                # Caso 1: CSV trae P_A
-                if "P_A" in r and r["P_A"]:
-                    try:
-                        P_A = float(r["P_A"])
-                        rows.append((m_phi, k_rot, P_A))
-                    except:
-                        pass
-                    continue
+        parts.extend(file_parts)
+        n_rows += n_file
 
-                # Caso 2: calcular P_A desde N_A / N_total
-                N_total_raw = r.get("N_total")
-                N_A_raw = r.get("N_A")
+    print(f"[INFO] Filas válidas para mapa 2D: {n_rows}")
 
-                if not N_total_raw or not N_A_raw:
-                    continue  # CSV boundary* → descartar
-
-                try:
-                    N_total = float(N_total_raw)
-                    N_A = float(N_A_raw)
-                except:
-                    continue
-
-                if N_total > 0:
-                    P_A = N_A / N_total
-                    rows.append((m_phi, k_rot, P_A))
-
-    print(f"[INFO] Filas válidas para mapa 2D: {len(rows)}")
-    return rows
+    # columnas: m_phi, k_rot, Σ P_A, n (una fila por celda y bloque)
+    return np.vstack(parts) if parts else np.empty((0, 4))
 
 
 # ============================================================
@@ -85,56 +141,98 @@ def read_rows(results_dir):
 # color → P_A promedio
 # ============================================================
 
-def build_grid(rows):
-    grid = defaultdict(list)
+def build_grid(parts):
+    if npg is None:
+        return build_grid_pandas(parts)
 
-    for m_phi, k_rot, P_A in rows:
-        grid[(m_phi, k_rot)].append(P_A)
+    mphis, krots, sums, counts = np.asarray(parts, dtype=float).T
 
-    mphi_vals = sorted({k[0] for k in grid})
-    krot_vals = sorted({k[1] for k in grid})
+    mphi_vals = np.unique(mphis)
+    krot_vals = np.unique(krots)
 
     M = len(mphi_vals)
     K = len(krot_vals)
 
-    PA_grid = np.full((K, M), np.nan)
+    # Índices enteros (fila k_rot, columna m_phi) y reducción agrupada
+    # en una pasada (backend C/numba de numpy-groupies)
+    group_idx = np.vstack([np.searchsorted(krot_vals, krots),
+                           np.searchsorted(mphi_vals, mphis)])
+
+    cell_sums = npg.aggregate(group_idx, sums, "sum", size=(K, M), fill_value=0.0)
+    cell_counts = npg.aggregate(group_idx, counts, "sum", size=(K, M), fill_value=0.0)
+
+    # celdas sin datos → NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        PA_grid = np.where(cell_counts > 0, cell_sums / cell_counts, np.nan)
+
+    return mphi_vals, krot_vals, PA_grid
 
-    for i, k_rot in enumerate(krot_vals):
-        for j, m_phi in enumerate(mphi_vals):
-            vals = grid.get((m_phi, k_rot), [])
-            if vals:
-                PA_grid[i, j] = np.mean(vals)
 
-    return np.array(mphi_vals), np.array(krot_vals), PA_grid
+def build_grid_pandas(parts):
+    parts = pd.DataFrame(parts, columns=["m_phi", "k_rot", "sum", "count"])
+
+    # Agregado y reshape en una pasada (groupby hash de pandas):
+    # filas k_rot, columnas m_phi; celdas sin datos → NaN
+    cells = parts.groupby(["m_phi", "k_rot"])[["sum", "count"]].sum()
+    pivot = (cells["sum"] / cells["count"]).unstack("m_phi")
+
+    return pivot.columns.to_numpy(), pivot.index.to_numpy(), pivot.to_numpy()
 
 
 # ============================================================
 # FUNCIÓN 3 — PINTAR EL MAPA 2D
 # ============================================================
 
+class MapPlotter:
+    """
+    Figura del mapa P_A(m_phi, k_rot) creada una sola vez.
+
+    Ejes, barra de color y etiquetas se montan en __init__; cada
+    llamada a plot() solo actualiza la imagen (set_data / set_extent)
+    y guarda, así un barrido de mapas no reconstruye la figura.
+    """
+
+    def __init__(self):
+        # RGBA precalculado (uint8): imshow no repite el mapeo escalar → RGBA
+        # (P_A ∈ [0, 1]: norma fija, sin recorrer el array; NaN → transparente)
+        self.norm = mcolors.Normalize(vmin=0.0, vmax=1.0)
+        self.cmap = plt.get_cmap("viridis")
+
+        self.fig, self.ax = plt.subplots(figsize=(10, 6))
+        self.im = self.ax.imshow(
+            np.zeros((1, 1, 4), dtype=np.uint8),
+            origin="lower",
+            aspect="auto",
+            interpolation="nearest",
+        )
+
+        # Barra de color con la misma norma/cmap
+        cbar = self.fig.colorbar(
+            cm.ScalarMappable(norm=self.norm, cmap=self.cmap), ax=self.ax
+        )
+        cbar.set_label("P_A")
+
+        self.ax.set_xlabel("m_phi")
+        self.ax.set_ylabel("k_rot")
+        self.ax.set_title("Mapa 2D de probabilidad de sincronía  P_A(m_phi, k_rot)")
+        self.ax.grid(False)
+
+    def plot(self, mphis, krots, PA_grid, outfile):
+        self.im.set_data(self.cmap(self.norm(PA_grid), bytes=True))
+        self.im.set_extent([mphis.min(), mphis.max(), krots.min(), krots.max()])
+        self.fig.tight_layout()
+
+        self.fig.savefig(outfile, dpi=200)
+        print(f"[INFO] Mapa 2D guardado en {outfile}")
+
+    def close(self):
+        plt.close(self.fig)
+
+
 def plot_PA_map(mphis, krots, PA_grid, outfile):
-    plt.figure(figsize=(10, 6))
-
-    im = plt.imshow(
-        PA_grid,
-        origin="lower",
-        aspect="auto",
-        extent=[mphis.min(), mphis.max(), krots.min(), krots.max()],
-        interpolation="nearest",
-        cmap="viridis"
-    )
-
-    cbar = plt.colorbar(im)
-    cbar.set_label("P_A")
-
-    plt.xlabel("m_phi")
-    plt.ylabel("k_rot")
-    plt.title("Mapa 2D de probabilidad de sincronía  P_A(m_phi, k_rot)")
-    plt.grid(False)
-    plt.tight_layout()
-
-    plt.savefig(outfile, dpi=200)
-    print(f"[INFO] Mapa 2D guardado en {outfile}")
+    plotter = MapPlotter()
+    plotter.plot(mphis, krots, PA_grid, outfile)
+    plotter.close()
 
 
 # ============================================================
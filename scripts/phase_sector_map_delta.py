@@ -1,8 +1,10 @@
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")   # headless batch run: no GUI backend
 import matplotlib.pyplot as plt
 
-from phase_evolution_ode import run_phase_evolution
+from phase_evolution_ode import run_phase_evolution_batch
 from phase_classifier import classify_sector   # clasificador A/B/C
 
 # ================================
@@ -13,59 +15,79 @@ mphi_values = np.linspace(0.20, 1.00, 40)          # 40 puntos
 dphi_ini_values = np.linspace(0.0, np.pi, 80)      # 80 puntos
 k_rot = 0.3835                                     # eje casi crítico
 
-results = []
-
 print("\n==============================================")
 print("     PHASE 3 — 2D MAP (mφ, Δφ_ini)")
 print("==============================================\n")
 
-for mphi in mphi_values:
-    print(f"Scanning m_phi = {mphi:.4f} ...")
+M = len(mphi_values)
+D = len(dphi_ini_values)
 
-    for dphi_ini in dphi_ini_values:
+# Todas las trayectorias en una sola integración por lotes
+# (RK4 compilado, en paralelo sobre los M × D puntos)
+print(f"Scanning {M * D} points (batched) ...")
 
-        # Integrar trayectoria con el solver correcto
-        a, dphi, _ = run_phase_evolution(
-            m_phi=mphi,
-            k_rot=k_rot,
-            q=1.0,
-            delta_phi_ini=dphi_ini,
-            delta_phidot_ini=0.0
-        )
+# Resultados preasignados: fila idx = i*D + j
+# ↔ (mphi_values[i], dphi_ini_values[j])
+results = np.empty(
+    M * D, dtype=[("m_phi", "f8"), ("delta_phi_ini", "f8"), ("sector", "U1")]
+)
+results["m_phi"] = np.repeat(mphi_values, D)
+results["delta_phi_ini"] = np.tile(dphi_ini_values, M)
+
+a, dphi_all, _ = run_phase_evolution_batch(
+    m_phi_arr=results["m_phi"],
+    k_rot_arr=k_rot,
+    delta_phi_ini_arr=results["delta_phi_ini"],
+    q=1.0,
+    delta_phidot_ini=0.0,
+)
 
-        # Clasificar
-        sector = classify_sector(a, dphi)
+# Clasificar
+sectors = [classify_sector(a, dphi) for dphi in dphi_all]
 
-        results.append([mphi, dphi_ini, sector])
+# Códigos por sector (A→0, B→1, C→2) en una sola operación de pandas,
+# sin búsqueda en diccionario por elemento; etiqueta desconocida → -1
+codes = pd.Categorical(sectors, categories=["A", "B", "C"]).codes
 
-# ================================
-#   GUARDAR CSV
-# ================================
-df = pd.DataFrame(results, columns=["m_phi", "delta_phi_ini", "sector"])
-df.to_csv("results_phase_sectors/phase_sector_map_delta.csv", index=False)
+if (codes < 0).any():
+    unknown = sorted({s for s, c in zip(sectors, codes) if c < 0})
+    raise ValueError(f"Etiquetas de sector desconocidas: {unknown}")
 
-print("\nSaved CSV → results_phase_sectors/phase_sector_map_delta.csv")
+# Ya validadas: todas caben en el campo "U1"
+results["sector"] = sectors
 
 # ================================
-#   MAPA 2D
+#   MAPA 2D (códigos por sector)
 # ================================
 
-sector_map = {"A": 0, "B": 1, "C": 2}
+Z = codes.reshape(M, D).astype(np.int8, copy=False)
 
-Z = np.array([sector_map[s] for s in df["sector"]]).reshape(
-    len(mphi_values), len(dphi_ini_values)
+# ================================
+#   GUARDAR CSV
+# ================================
+pd.DataFrame.from_records(results).to_csv(
+    "results_phase_sectors/phase_sector_map_delta.csv", index=False
 )
 
+print("\nSaved CSV → results_phase_sectors/phase_sector_map_delta.csv")
+
 plt.figure(figsize=(12, 6))
-plt.imshow(
+im = plt.imshow(
     Z,
     origin="lower",
     extent=[0, np.pi, mphi_values[0], mphi_values[-1]],
     aspect="auto",
-    cmap="viridis"
+    cmap="viridis",
+    # códigos de sector: remuestreo "nearest" sobre los datos, antes del
+    # mapeo RGBA, y rango fijo sin recorrer el array
+    interpolation="nearest",
+    interpolation_stage="data",
+    vmin=0,
+    vmax=2,
 )
 
 plt.colorbar(
+    im,
     ticks=[0, 1, 2],
     label="Sector"
 ).ax.set_yticklabels(["A", "B", "C"])
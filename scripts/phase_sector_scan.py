@@ -14,14 +14,23 @@ This guarantees that all asymptotic sectors A, B, C appear.
 Output:
     results_phase_sectors/
         phase_sectors_summary.csv
-        trajectories/*.npz
+            one row per run; the traj_group column names the run's
+            group inside trajectories.h5 (not a file path)
+        trajectories.h5
+            single HDF5 store, one group per run ("traj_m…_k…_q…_d…"):
+            datasets a, delta_phi, delta_phidot; attributes m_phi,
+            k_rot, q, delta_phi_ini, sector
 """
 
 import os
 import csv
+from itertools import product
+
+import h5py
 import numpy as np
 
-from phase_evolution_ode import run_phase_evolution
+# njit: numba's, or the plain-Python fallback defined there
+from phase_evolution_ode import njit, run_phase_evolution_batch
 
 
 # ================================================================
@@ -29,50 +38,84 @@ from phase_evolution_ode import run_phase_evolution
 # ================================================================
 
 BASE_DIR = "results_phase_sectors"
-TRAJ_DIR = os.path.join(BASE_DIR, "trajectories")
+TRAJ_FILE = os.path.join(BASE_DIR, "trajectories.h5")
 
 os.makedirs(BASE_DIR, exist_ok=True)
-os.makedirs(TRAJ_DIR, exist_ok=True)
 
 
 # ================================================================
 # 2. Sector classification logic (robust)
 # ================================================================
 
-def classify_phase_trajectory(delta_phi_arr):
-    """
-    Classify Δφ(a) trajectory into Sector A / B / C.
+SECTOR_LABELS = ("A", "B", "C")
 
-    A: Converges to constant < π
-    B: Converges to π  (antipodal)
-    C: Drifting or oscillatory / non-convergent
 
-    Uses last 10% of points.
+@njit(cache=True)
+def tail_mod_stats_nb(dphi, start):
     """
+    Mean and std of Δφ mod 2π over dphi[start:], in a single pass.
 
-    n = len(delta_phi_arr)
-    if n < 50:
-        return "C"
+    Sums are taken relative to the first tail value (shifted data), so
+    the one-pass variance stays accurate for tightly converged tails.
+    """
+    TWO_PI = 2.0 * np.pi
+    n = dphi.shape[0]
+
+    shift = dphi[start] % TWO_PI
+    s = 0.0
+    s2 = 0.0
+    for i in range(start, n):
+        v = dphi[i] % TWO_PI - shift
+        s += v
+        s2 += v * v
+
+    m = n - start
+    d = s / m
+    var = s2 / m - d * d
+    return shift + d, np.sqrt(max(var, 0.0))
 
-    tail = delta_phi_arr[int(0.9 * n):]
-    phi_mod = np.mod(tail, 2.0 * np.pi)
 
-    phi_mean = float(np.mean(phi_mod))
-    phi_std  = float(np.std(phi_mod))
+@njit(cache=True)
+def sector_code_nb(phi_mean, phi_std):
+    """
+    Sector code from the tail statistics of Δφ mod 2π.
 
+    A: Converges to constant < π
+    B: Converges to π  (antipodal)
+    C: Drifting or oscillatory / non-convergent
+
+    Returns 0 / 1 / 2 for A / B / C (see SECTOR_LABELS).
+    """
     pi = np.pi
     tol_conv = 0.08     # Convergence tolerance
     tol_pi   = 0.25     # Distance to π
 
     # A: stable synchronized phase (< π)
     if (phi_std < tol_conv) and (phi_mean < pi - tol_pi):
-        return "A"
+        return 0
 
     # B: stable antipodal phase (~ π)
     if (phi_std < tol_conv) and (abs(phi_mean - pi) < tol_pi):
-        return "B"
+        return 1
+
+    return 2
+
+
+@njit(cache=True)
+def classify_phase_trajectory_nb(dphi):
+    """
+    Classify Δφ(a) trajectory into Sector A / B / C.
+
+    Uses last 10% of points, with a single pass over them for the
+    statistics. Returns (code, phi_mean, phi_std); code is 0 / 1 / 2
+    for A / B / C, and trajectories shorter than 50 points are C.
+    """
+    n = dphi.shape[0]
+    if n < 50:
+        return 2, np.nan, np.nan
 
-    return "C"
+    phi_mean, phi_std = tail_mod_stats_nb(dphi, int(0.9 * n))
+    return sector_code_nb(phi_mean, phi_std), phi_mean, phi_std
 
 
 # ================================================================
@@ -99,7 +142,71 @@ delta_phi_ini_list = [
 
 summary_path = os.path.join(BASE_DIR, "phase_sectors_summary.csv")
 
-with open(summary_path, mode="w", newline="") as f:
+runs = list(product(m_phi_list, k_rot_list, q_list, delta_phi_ini_list))
+m_arr, k_arr, q_arr, dphi_ini_arr = np.array(runs).T
+
+# Whole ensemble in one batched integration (compiled RK4, parallel)
+print(f"\nIntegrating {len(runs)} runs ...")
+
+a_arr, dphi_all, dphidot_all = run_phase_evolution_batch(
+    m_arr,
+    k_arr,
+    dphi_ini_arr,
+    q=q_arr,
+    delta_phidot_ini=0.0,
+    a_ini=1e-3,
+    a_max=10.0,
+    n_steps=2000,
+)
+
+# Single HDF5 store: one group per run (datasets a, delta_phi, delta_phidot;
+# parameters and sector as attributes). track_order keeps scan order.
+# Summary rows are collected here and written once after the loop
+rows = []
+
+with h5py.File(TRAJ_FILE, "w", track_order=True) as h5:
+
+    for run, (m_phi, k_rot, q, delta_phi_ini) in enumerate(runs):
+
+        dphi_arr = dphi_all[run]
+        dphidot_arr = dphidot_all[run]
+
+        # Sector classification and asymptotic tail stats (Δφ mod 2π,
+        # last 10%), one pass
+        code, phi_mean, phi_std = classify_phase_trajectory_nb(dphi_arr)
+        sector = SECTOR_LABELS[code]
+
+        # Group naming
+        base_id = f"m{m_phi:.2f}_k{k_rot:.2f}_q{q:.2f}_d{delta_phi_ini:.2f}"
+        base_id = base_id.replace(".", "p")
+
+        traj_group = f"traj_{base_id}"
+
+        # Save trajectory
+        g = h5.create_group(traj_group)
+        g.create_dataset("a", data=a_arr, compression="lzf")
+        g.create_dataset("delta_phi", data=dphi_arr, compression="lzf")
+        g.create_dataset("delta_phidot", data=dphidot_arr, compression="lzf")
+        g.attrs.update(
+            m_phi=m_phi,
+            k_rot=k_rot,
+            q=q,
+            delta_phi_ini=delta_phi_ini,
+            sector=sector,
+        )
+
+        # Save row
+        rows.append([
+            m_phi, k_rot, q,
+            delta_phi_ini,
+            sector,
+            phi_mean,
+            phi_std,
+            traj_group,
+        ])
+
+# Single buffered write of the whole summary
+with open(summary_path, mode="w", newline="", buffering=1 << 20) as f:
 
     writer = csv.writer(f)
     writer.writerow([
@@ -108,68 +215,12 @@ with open(summary_path, mode="w", newline="") as f:
         "sector",
         "phi_mean_tail",
         "phi_std_tail",
-        "traj_file"
+        "traj_group"
     ])
-
-    for m_phi in m_phi_list:
-        for k_rot in k_rot_list:
-            for q in q_list:
-                for delta_phi_ini in delta_phi_ini_list:
-
-                    print(f"\nRunning m_phi={m_phi}, k_rot={k_rot}, q={q}, Δφ_ini={delta_phi_ini} ...")
-
-                    a_arr, dphi_arr, dphidot_arr = run_phase_evolution(
-                        m_phi=m_phi,
-                        k_rot=k_rot,
-                        q=q,
-                        delta_phi_ini=delta_phi_ini,
-                        delta_phidot_ini=0.0,
-                        a_ini=1e-3,
-                        a_max=10.0,
-                        n_steps=2000,
-                    )
-
-                    # Asymptotic tail
-                    tail = slice(int(0.9 * len(a_arr)), None)
-                    phi_tail = np.mod(dphi_arr[tail], 2 * np.pi)
-                    phi_mean = float(np.mean(phi_tail))
-                    phi_std  = float(np.std(phi_tail))
-
-                    # Sector classification
-                    sector = classify_phase_trajectory(dphi_arr)
-
-                    # File naming
-                    base_id = f"m{m_phi:.2f}_k{k_rot:.2f}_q{q:.2f}_d{delta_phi_ini:.2f}"
-                    base_id = base_id.replace(".", "p")
-
-                    traj_filename = f"traj_{base_id}.npz"
-                    traj_path = os.path.join(TRAJ_DIR, traj_filename)
-
-                    # Save trajectory
-                    np.savez(
-                        traj_path,
-                        a=a_arr,
-                        delta_phi=dphi_arr,
-                        delta_phidot=dphidot_arr,
-                        m_phi=m_phi,
-                        k_rot=k_rot,
-                        q=q,
-                        delta_phi_ini=delta_phi_ini,
-                        sector=sector,
-                    )
-
-                    # Save row
-                    writer.writerow([
-                        m_phi, k_rot, q,
-                        delta_phi_ini,
-                        sector,
-                        phi_mean,
-                        phi_std,
-                        traj_filename,
-                    ])
+    writer.writerows(rows)
 
 print("\n===================================================")
 print(" PHASE SECTOR SCAN COMPLETED — PHASE 2.1 (Δφ_ini sweep) ")
 print(" Summary:", summary_path)
-print(" Trajectories stored in:", TRAJ_DIR)
+print(" Trajectories stored in:", TRAJ_FILE)
 print("===================================================\n")
@@ -13,7 +13,15 @@ Output:
 """
 
 import os
+import sys
+import h5py
 import numpy as np
+import matplotlib
+
+# Interactive window only when run from a terminal; Agg otherwise
+INTERACTIVE = sys.stdout.isatty()
+if not INTERACTIVE:
+    matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 
@@ -22,44 +30,44 @@ import matplotlib.pyplot as plt
 # ====================================================
 
 BASE_DIR = "results_phase_sectors"
-TRAJ_DIR = os.path.join(BASE_DIR, "trajectories")
+TRAJ_FILE = os.path.join(BASE_DIR, "trajectories.h5")
 
-if not os.path.isdir(TRAJ_DIR):
-    raise RuntimeError("Trajectory directory not found. "
+if not os.path.isfile(TRAJ_FILE):
+    raise RuntimeError("Trajectory store not found. "
                        "Run phase_sector_scan.py first.")
 
 examples = {"A": None, "B": None, "C": None}
 
-# Search for one file per sector
-for fname in os.listdir(TRAJ_DIR):
-    if not fname.endswith(".npz"):
-        continue
-
-    path = os.path.join(TRAJ_DIR, fname)
-    data = np.load(path)
-    sector = str(data["sector"])
-
-    if sector in examples and examples[sector] is None:
-        examples[sector] = path
-
 # ====================================================
 # 2. Load trajectories that exist
 # ====================================================
 
 loaded = {}
 
-for S in ["A", "B", "C"]:
-    if examples[S] is None:
-        print(f"WARNING: Sector {S} not found in dataset — skipping.")
-    else:
-        d = np.load(examples[S])
-        loaded[S] = {
-            "a": d["a"],
-            "phi": d["delta_phi"],
-            "m": float(d["m_phi"]),
-            "k": float(d["k_rot"]),
-            "q": float(d["q"]),
-        }
+with h5py.File(TRAJ_FILE, "r") as h5:
+
+    # First run of each sector, chosen from the group attributes only;
+    # array data is read just for the selected groups. Groups are
+    # visited lazily and the scan stops once all sectors are found.
+    for g in h5.values():
+        sector = g.attrs["sector"]
+        if sector in examples and examples[sector] is None:
+            examples[sector] = g.name
+            if all(examples.values()):
+                break
+
+    for S in ["A", "B", "C"]:
+        if examples[S] is None:
+            print(f"WARNING: Sector {S} not found in dataset — skipping.")
+        else:
+            g = h5[examples[S]]
+            loaded[S] = {
+                "a": g["a"][()],
+                "phi": g["delta_phi"][()],
+                "m": float(g.attrs["m_phi"]),
+                "k": float(g.attrs["k_rot"]),
+                "q": float(g.attrs["q"]),
+            }
 
 
 # ====================================================
@@ -92,6 +100,7 @@ plt.tight_layout()
 
 out_path = os.path.join(BASE_DIR, "phase_sectors_examples.png")
 plt.savefig(out_path, dpi=300)
-plt.show()
+if INTERACTIVE:
+    plt.show()
 
 print("\nFIGURE GENERATED:", out_path)
@@ -10,11 +10,29 @@ CosmicThinker & Toko – Phase-Bifurcation Cosmogenesis Project (2025)
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+import sys
+import matplotlib
+
+try:
+    import pyqtgraph as pg
+except ImportError:  # optional: without it the matplotlib window is used
+    pg = None
+
+# Interactive window only when run from a terminal. With pyqtgraph the
+# window is a PyQtGraph plot and matplotlib only renders the saved PNG.
+INTERACTIVE = sys.stdout.isatty()
+if not INTERACTIVE or pg is not None:
+    matplotlib.use("Agg")
+import matplotlib.pyplot as plt
 
 from phase_evolution_ode import run_phase_evolution
 
+# Cheaper Agg rasterization of the dense trajectory curves
+matplotlib.rcParams["path.simplify"] = True
+matplotlib.rcParams["path.simplify_threshold"] = 1.0
+matplotlib.rcParams["agg.path.chunksize"] = 10000
+
 
 # ================================================================
 # Configuration of the B-region scan
@@ -48,7 +66,7 @@ os.makedirs(outdir, exist_ok=True)
 # Produce the trajectories
 # ================================================================
 
-plt.figure(figsize=(10, 6))
+trajectories = []
 
 for (m_phi, k_rot) in params_B:
 
@@ -65,13 +83,18 @@ for (m_phi, k_rot) in params_B:
     )
 
     label = f"m={m_phi:.4f}, k={k_rot:.4f}"
-    plt.plot(a, dphi, lw=1.5, alpha=0.85, label=label)
+    trajectories.append((a, dphi, label))
 
 
 # ================================================================
-# Plot styling
+# Static figure (matplotlib)
 # ================================================================
 
+plt.figure(figsize=(10, 6))
+
+for a, dphi, label in trajectories:
+    plt.plot(a, dphi, lw=1.5, alpha=0.85, label=label, antialiased=False)
+
 plt.xlabel("Scale factor a", fontsize=14)
 plt.ylabel(r"$\Delta\phi(a)$", fontsize=14)
 plt.title("Sector B Trajectories Near (mφ≈0.40, krot≈0.38–0.39)", fontsize=16)
@@ -81,6 +104,35 @@ plt.legend(fontsize=9)
 outfile = os.path.join(outdir, "sectorB_trajectories.png")
 plt.tight_layout()
 plt.savefig(outfile, dpi=170)
-plt.show()
 
 print("\nSaved sector-B trajectory figure →", outfile)
+
+
+# ================================================================
+# Interactive viewer (PyQtGraph, matplotlib window as fallback)
+# ================================================================
+
+def show_pyqtgraph(trajectories):
+    """Open the trajectories in a PyQtGraph window, one curve each."""
+    pg.mkQApp("Sector B trajectories")
+    win = pg.GraphicsLayoutWidget(show=True, title="Sector B trajectories")
+    win.resize(1000, 600)
+
+    p = win.addPlot(title="Sector B Trajectories Near (mφ≈0.40, krot≈0.38–0.39)")
+    p.addLegend()
+    p.showGrid(x=True, y=True, alpha=0.3)
+    p.setLabel("bottom", "Scale factor a")
+    p.setLabel("left", "Δφ(a)")
+
+    for i, (a, dphi, label) in enumerate(trajectories):
+        p.plot(a, dphi, pen=pg.intColor(i, hues=len(trajectories)), name=label)
+
+    pg.exec()
+
+
+if INTERACTIVE:
+    if pg is not None:
+        plt.close()
+        show_pyqtgraph(trajectories)
+    else:
+        plt.show()